@@ -1,14 +1,36 @@
 from collections.abc import Iterable
 from copy import copy
+from functools import cached_property
 from os import PathLike
 from typing import Literal, Optional, Sequence, Union
 
 import numpy as np
-from numpy.typing import ArrayLike
+from numpy.typing import ArrayLike, DTypeLike
 
 from bbox.utils import Pairable, pair
 
 
+def _xyxy_to_xyxy(arr: np.ndarray) -> None:
+    pass
+
+
+def _xywh_to_xyxy(arr: np.ndarray) -> None:
+    wh = arr[..., 2:]
+    wh += arr[..., :2] - 1
+
+
+def _ccwh_to_xyxy(arr: np.ndarray) -> None:
+    xy, wh = arr[..., :2], arr[..., 2:]
+    tmp = wh - 1
+    tmp /= 2
+    xy -= tmp
+    np.subtract(xy, 1, out=tmp)
+    wh += tmp
+
+
+_TO_XYXY = {"xyxy": _xyxy_to_xyxy, "xywh": _xywh_to_xyxy, "ccwh": _ccwh_to_xyxy}
+
+
 class BBox:
     def __init__(
         self,
@@ -16,33 +38,29 @@ class BBox:
         mode: Literal["xyxy", "xywh", "ccwh"] = "xyxy",
         base: float = 0,
         copy: bool = False,
+        dtype: DTypeLike = None,
     ) -> None:
-        if mode not in ("xyxy", "xywh", "ccwh"):
+        if not isinstance(mode, str) or mode not in _TO_XYXY:
             raise ValueError("mode must be 'xyxy', 'xywh', or 'ccwh'")
 
-        if isinstance(arr, np.ndarray):
-            if copy:
-                arr = arr.copy()
+        if copy:
+            arr = np.array(arr, dtype)
         else:
-            arr = np.array(arr)
+            arr = np.asarray(arr, dtype)
 
         if arr.shape[-1] != 4:
             raise ValueError("expected array of shape (*, 4) but got " + str(arr.shape))
 
-        if mode == "xywh":
-            arr[..., 2:] += arr[..., :2] - 1
-        elif mode == "ccwh":
-            arr[..., :2] -= (arr[..., 2:] - 1) / 2
-            arr[..., 2:] += arr[..., :2] - 1
-
-        arr -= base
+        _TO_XYXY[mode](arr)
+        if np.ndim(base) or base:
+            arr -= base
         self._xyxy = arr
 
     @property
     def ndim(self) -> int:
         return self._xyxy.ndim - 1
 
-    @property
+    @cached_property
     def shape(self) -> tuple[int, ...]:
         return self._xyxy.shape[:-1]
 
@@ -64,7 +82,10 @@ class BBox:
 
     @property
     def _center(self) -> np.ndarray:
-        return (self._xyxy[..., :2] + self._xyxy[..., 2:]) / 2
+        arr = self._xyxy
+        cxcy = np.add(arr[..., :2], arr[..., 2:], dtype=np.result_type(arr, 0.5))
+        cxcy *= 0.5
+        return cxcy
 
     @property
     def center(self) -> tuple[np.ndarray, np.ndarray]:
@@ -73,7 +94,9 @@ class BBox:
 
     @property
     def _size(self) -> np.ndarray:
-        return self._xyxy[..., 2:] - self._xyxy[..., :2] + 1
+        wh = self._xyxy[..., 2:] - self._xyxy[..., :2]
+        wh += 1
+        return wh
 
     @property
     def size(self) -> tuple[np.ndarray, np.ndarray]:
@@ -82,8 +105,9 @@ class BBox:
 
     @property
     def area(self) -> np.ndarray:
-        width, height = self.size
-        return width * height * self.is_valid()
+        wh = self._size
+        np.maximum(wh, 0, out=wh)
+        return wh[..., 0] * wh[..., 1]
 
     def __repr__(self) -> str:
         return f"BBox({repr(self._xyxy)})"
@@ -105,43 +129,32 @@ class BBox:
         self._xyxy[key] = value
 
     def __and__(self, other: "BBox") -> "BBox":
-        lt = np.maximum(self._xyxy[..., :2], other._xyxy[..., :2])
-        rb = np.minimum(self._xyxy[..., 2:], other._xyxy[..., 2:])
-        return BBox(np.concatenate((lt, rb), -1))
+        a, b = self._xyxy, other._xyxy
+        arr = np.empty(np.broadcast_shapes(a.shape, b.shape), np.result_type(a, b))
+        np.maximum(a[..., :2], b[..., :2], out=arr[..., :2])
+        np.minimum(a[..., 2:], b[..., 2:], out=arr[..., 2:])
+        return BBox(arr)
 
     def __round__(self) -> "BBox":
         return BBox(self._xyxy.round())
 
     def __iadd__(self, point: Pairable[float]) -> "BBox":
-        dx, dy = pair(point)
-        self._xyxy[..., 0::2] += dx
-        self._xyxy[..., 1::2] += dy
-        return self
+        return self.add(point, self)
 
     def __add__(self, point: Pairable[float]) -> "BBox":
-        bb = copy(self)
-        bb += point
-        return bb
+        return self.add(point)
 
     def __isub__(self, point: Pairable[float]) -> "BBox":
-        dx, dy = pair(point)
-        self._xyxy[..., 0::2] -= dx
-        self._xyxy[..., 1::2] -= dy
-        return self
+        return self.sub(point, self)
 
     def __sub__(self, point: Pairable[float]) -> "BBox":
-        bb = copy(self)
-        bb -= point
-        return bb
+        return self.sub(point)
 
     def __imul__(self, factor: Pairable[float]) -> "BBox":
-        self.scale(factor, -0.5)
-        return self
+        return self.mul(factor, self)
 
     def __mul__(self, factor: Pairable[float]) -> "BBox":
-        bb = copy(self)
-        bb *= factor
-        return bb
+        return self.mul(factor)
 
     def __itruediv__(self, factor: Pairable[float]) -> "BBox":
         kx, ky = pair(factor)
@@ -153,6 +166,29 @@ class BBox:
         bb /= factor
         return bb
 
+    def add(self, point: Pairable[float], out: Optional["BBox"] = None) -> "BBox":
+        dx, dy = pair(point)
+        if out is None:
+            out = BBox(np.empty_like(self._xyxy))
+        np.add(self._xyxy[..., 0::2], dx, out=out._xyxy[..., 0::2])
+        np.add(self._xyxy[..., 1::2], dy, out=out._xyxy[..., 1::2])
+        return out
+
+    def sub(self, point: Pairable[float], out: Optional["BBox"] = None) -> "BBox":
+        dx, dy = pair(point)
+        if out is None:
+            out = BBox(np.empty_like(self._xyxy))
+        np.subtract(self._xyxy[..., 0::2], dx, out=out._xyxy[..., 0::2])
+        np.subtract(self._xyxy[..., 1::2], dy, out=out._xyxy[..., 1::2])
+        return out
+
+    def mul(self, factor: Pairable[float], out: Optional["BBox"] = None) -> "BBox":
+        if out is None:
+            out = copy(self)
+        elif out is not self:
+            np.copyto(out._xyxy, self._xyxy)
+        return out.scale(factor, -0.5)
+
     def is_valid(self) -> np.ndarray:
         w, h = self.size
         return (w > 0) & (h > 0)
@@ -163,10 +199,17 @@ class BBox:
         kx, ky = pair(factor)
         fpx, fpy = pair(fixed_point)
         bb = self if inplace else copy(self)
-        bb._xyxy[..., 0] = (bb._xyxy[..., 0] - 0.5 - fpx) * kx + fpx + 0.5
-        bb._xyxy[..., 1] = (bb._xyxy[..., 1] - 0.5 - fpy) * ky + fpy + 0.5
-        bb._xyxy[..., 2] = (bb._xyxy[..., 2] + 0.5 - fpx) * kx + fpx - 0.5
-        bb._xyxy[..., 3] = (bb._xyxy[..., 3] + 0.5 - fpy) * ky + fpy - 0.5
+        arr = bb._xyxy
+        dtype = np.result_type(arr, 0.5)
+        k = np.stack(np.broadcast_arrays(kx, ky, kx, ky), -1).astype(dtype)
+        offset = np.broadcast_arrays(fpx + 0.5, fpy + 0.5, fpx - 0.5, fpy - 0.5)
+        offset = np.stack(offset, -1).astype(dtype)
+        if arr.dtype == dtype:
+            arr -= offset
+            arr *= k
+            arr += offset
+        else:
+            arr[...] = (arr - offset) * k + offset
         return bb
 
     def reshape(self, *shape: int) -> "BBox":
@@ -175,31 +218,49 @@ class BBox:
 
     def is_inside(self, im_size: Pairable) -> np.ndarray:
         w, h = pair(im_size)
-        x0 = self._x0
-        y0 = self._y0
-        x1 = self._x1
-        y1 = self._y1
-        return (
-            (0 <= x0)
-            & (x0 <= w - 1)
-            & (0 <= y0)
-            & (y0 <= h - 1)
-            & (0 <= x1)
-            & (x1 <= w - 1)
-            & (0 <= y1)
-            & (y1 <= h - 1)
-        )
+        hi = np.stack(np.broadcast_arrays(w - 1, h - 1, w - 1, h - 1), -1)
+        return ((0 <= self._xyxy) & (self._xyxy <= hi)).all(-1)
 
     def rectify(self, im_size: Pairable) -> "BBox":
         w, h = pair(im_size)
-        xx = self._xyxy[..., 0::2].clip(0, w - 1)
-        yy = self._xyxy[..., 1::2].clip(0, h - 1)
-        arr = np.stack((xx[..., 0], yy[..., 0], xx[..., 1], yy[..., 1]), -1)
+        arr = np.empty(self._xyxy.shape, np.result_type(self._xyxy, w - 1, h - 1))
+        np.clip(self._xyxy[..., 0::2], 0, w - 1, out=arr[..., 0::2])
+        np.clip(self._xyxy[..., 1::2], 0, h - 1, out=arr[..., 1::2])
         return BBox(arr)
 
     def IoU(self, other: "BBox") -> float:
-        its_area = (self & other).area
-        return its_area / (self.area + other.area - its_area)
+        a, b = self._xyxy, other._xyxy
+        if a.ndim == b.ndim == 1 and a.dtype == b.dtype == np.float64:
+            return np.float64(_iou_scalar(a.tolist(), b.tolist()))
+        its_area = _intersection_area(self._xyxy, other._xyxy)
+        union = np.add(self.area, other.area, dtype=np.result_type(its_area, 0.5))
+        union -= its_area
+        return its_area / union
+
+
+def _intersection_area(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    wh = np.minimum(a[..., 2:], b[..., 2:])
+    wh -= np.maximum(a[..., :2], b[..., :2])
+    wh += 1
+    np.maximum(wh, 0, out=wh)
+    return wh[..., 0] * wh[..., 1]
+
+
+def _iou_scalar(a: list[float], b: list[float]) -> float:
+    its_w = max(min(a[2], b[2]) - max(a[0], b[0]) + 1, 0)
+    its_h = max(min(a[3], b[3]) - max(a[1], b[1]) + 1, 0)
+    its_area = its_w * its_h
+    area_a = max(a[2] - a[0] + 1, 0) * max(a[3] - a[1] + 1, 0)
+    area_b = max(b[2] - b[0] + 1, 0) * max(b[3] - b[1] + 1, 0)
+    union = area_a + area_b - its_area
+    return its_area / union if union else float("nan")
+
+
+def iou_matrix(a: BBox, b: BBox) -> np.ndarray:
+    its_area = _intersection_area(a._xyxy[..., None, :], b._xyxy)
+    union = np.add(a.area[..., None], b.area, dtype=np.result_type(its_area, 0.5))
+    union -= its_area
+    return np.divide(its_area, union, out=union)
 
 
 class AxisError(ValueError, IndexError):
@@ -213,8 +274,23 @@ def stack(bboxes: Sequence[BBox], axis: int = 0) -> BBox:
         raise AxisError(axis, ndim)
     if axis < 0:
         axis -= 1
-    arr = np.stack([bbox._xyxy for bbox in bboxes], axis)
-    return BBox(arr)
+    shape = bboxes[0]._xyxy.shape
+    dtype = np.result_type(*(bbox._xyxy for bbox in bboxes))
+    arr = np.empty((len(bboxes), *shape), dtype)
+    for i, bbox in enumerate(bboxes):
+        if bbox._xyxy.shape != shape:
+            raise ValueError("all BBoxes must have the same shape")
+        arr[i] = bbox._xyxy
+    return BBox(np.moveaxis(arr, 0, axis))
+
+
+def unstack(bbox: BBox, axis: int = 0) -> list[BBox]:
+    ndim = bbox.ndim
+    if axis not in range(-ndim, ndim):
+        raise AxisError(axis, ndim)
+    if axis < 0:
+        axis -= 1
+    return [BBox(arr) for arr in np.moveaxis(bbox._xyxy, axis, 0)]
 
 
 def loadtxt(
@@ -7,6 +7,11 @@ Pair = tuple[T, T]
 
 
 def pair(x: Pairable[T]) -> Pair[T]:
+    t = type(x)
+    if t is tuple and len(x) == 2:
+        return cast(Pair[T], x)
+    if t is int or t is float:
+        return cast(Pair[T], (x, x))
     try:
         if len(x) == 2:
             return cast(Pair[T], tuple(x))
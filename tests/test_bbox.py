@@ -1,162 +1,266 @@
 from tempfile import TemporaryFile
-from typing import Union
-from unittest import TestCase, main
+from unittest import TestCase
 
 import numpy as np
 from numpy.testing import assert_allclose, assert_array_equal
 
-from bbox.bbox import AxisError, BBox, loadtxt, stack
+from bbox.bbox import AxisError, BBox, iou_matrix, loadtxt, stack, unstack
 
 
 class TestBBox(TestCase):
-    def setUp(self, seed=0) -> None:
-        np.random.seed(seed)
+    @classmethod
+    def setUpClass(cls, seed=0) -> None:
+        cls._arr = np.random.default_rng(seed).random((2, 3, 4))
+        cls._arr.setflags(write=False)
 
-    @staticmethod
-    def _generate_random_array() -> np.ndarray:
-        return np.random.rand(2, 3, 4)
+    def setUp(self, seed=0) -> None:
+        self._rng = np.random.default_rng(seed)
 
     def test_init_arr_pos(self) -> None:
-        valid_arrays = [(0, 0, 0, 0), [[1, 2, 3, 4]], np.random.rand(2, 3, 4)]
+        valid_arrays = [(0, 0, 0, 0), [[1, 2, 3, 4]], self._arr]
         for arr in valid_arrays:
-            bbox = BBox(arr)
-            self.assertIsInstance(bbox, BBox)
+            with self.subTest(arr=arr):
+                self.assertIsInstance(BBox(arr), BBox)
 
     def test_init_arr_neg(self) -> None:
-        invalid_arrays = [(5, 6), [[7], [8], [9], [0]], np.random.rand(4, 5)]
+        invalid_arrays = [(5, 6), [[7], [8], [9], [0]], np.empty((4, 5))]
         for arr in invalid_arrays:
-            with self.assertRaises(ValueError):
+            with self.subTest(arr=arr), self.assertRaises(ValueError):
                 BBox(arr)
 
     def test_init_mode_pos(self) -> None:
-        arr = self._generate_random_array()
+        arr = self._arr
         valid_modes = ("xyxy", "xywh", "ccwh")
         for mode in valid_modes:
-            bbox = BBox(arr, mode=mode)
-            self.assertIsInstance(bbox, BBox)
+            with self.subTest(mode=mode):
+                self.assertIsInstance(BBox(arr, mode=mode, copy=True), BBox)
 
     def test_init_mode_neg(self) -> None:
-        arr = self._generate_random_array()
-        invalid_modes = ("xxyy", "xyhw", "cxcywh")
+        arr = np.empty((1, 4))
+        invalid_modes = ("xxyy", "xyhw", "cxcywh", ["xyxy"])
         for mode in invalid_modes:
-            with self.assertRaises(ValueError):
+            with self.subTest(mode=mode), self.assertRaises(ValueError):
                 BBox(arr, mode=mode)
 
     def test_init_base(self) -> None:
-        arr = self._generate_random_array()
-        bases = (0, 1)
+        arr = self._arr
+        bases = (0, 1, np.arange(4))
         for base in bases:
-            bbox = BBox(arr, base=base)
-            self.assertIsInstance(bbox, BBox)
+            with self.subTest(base=base):
+                bbox = BBox(arr, base=base, copy=True)
+                assert_allclose(bbox._xyxy, arr - base)
 
     def test_init_copy_false(self) -> None:
-        arr = self._generate_random_array()
+        arr = self._arr
         bbox = BBox(arr, copy=False)
-        self.assertIs(arr, bbox._xyxy)
+        self.assertTrue(np.shares_memory(arr, bbox._xyxy))
 
     def test_init_copy_true(self) -> None:
-        arr = self._generate_random_array()
+        arr = self._arr
         bbox = BBox(arr, copy=True)
-        self.assertIsNot(arr, bbox._xyxy)
+        self.assertFalse(np.shares_memory(arr, bbox._xyxy))
+
+    def test_init_dtype(self) -> None:
+        arr = self._arr
+        for dtype in (np.float32, np.float64):
+            with self.subTest(dtype=dtype):
+                self.assertEqual(BBox(arr, dtype=dtype)._xyxy.dtype, dtype)
+                arr2 = arr.astype(dtype)
+                self.assertEqual(BBox(arr2)._xyxy.dtype, dtype)
 
     def test_coordinates(self) -> None:
-        arr = self._generate_random_array()
+        arr = self._arr
         bbox = BBox(arr)
-        arr2 = np.stack((bbox._x0, bbox._y0, bbox._x1, bbox._y1), -1)
-        assert_array_equal(arr, arr2)
+        arr2 = np.empty_like(arr)
+        arr2[..., 0] = bbox._x0
+        arr2[..., 1] = bbox._y0
+        arr2[..., 2] = bbox._x1
+        arr2[..., 3] = bbox._y1
+        assert_array_equal(arr, arr2, strict=True)
 
     def test_size_xywh(self) -> None:
-        arr = self._generate_random_array()
+        arr = self._arr
         bbox = BBox(arr)
         w, h = bbox.size
-        arr2 = np.stack((bbox._x0, bbox._y0, w, h), -1)
+        arr2 = np.empty_like(arr)
+        arr2[..., 0] = bbox._x0
+        arr2[..., 1] = bbox._y0
+        arr2[..., 2] = w
+        arr2[..., 3] = h
         bbox2 = BBox(arr2, mode="xywh")
         assert_allclose(arr, bbox2._xyxy)
 
     def test_center_size_ccwh(self) -> None:
-        arr = self._generate_random_array()
+        arr = self._arr
         bbox = BBox(arr)
         cx, cy = bbox.center
         w, h = bbox.size
-        arr2 = np.stack((cx, cy, w, h), -1)
+        arr2 = np.empty_like(arr)
+        arr2[..., 0] = cx
+        arr2[..., 1] = cy
+        arr2[..., 2] = w
+        arr2[..., 3] = h
         bbox2 = BBox(arr2, mode="ccwh")
         assert_allclose(arr, bbox2._xyxy)
 
     def test_getitem_setitem(self) -> None:
-        arr = self._generate_random_array()
+        arr = self._arr
         bbox = BBox(arr, copy=True)
-        bbox[:1] = bbox[:1]._xyxy
-        assert_array_equal(bbox._xyxy, arr)
+        bbox[:1] = bbox[1:]._xyxy
+        assert_array_equal(bbox[:1]._xyxy, arr[1:], strict=True)
+        assert_array_equal(bbox[1:]._xyxy, arr[1:], strict=True)
 
     def test_add_associative(self) -> None:
-        arr = self._generate_random_array()
+        arr = self._arr
         bbox = BBox(arr)
-        a, b = np.random.rand(2)
+        a, b = self._rng.random(2)
         bbox2 = bbox + a + b
         bbox3 = bbox + (a + b)
         assert_allclose(bbox2._xyxy, bbox3._xyxy)
 
     def test_add_sub(self) -> None:
-        arr = self._generate_random_array()
+        arr = self._arr
         bbox = BBox(arr)
-        a = np.random.rand()
+        a = self._rng.random()
         bbox2 = bbox + a - (a, a)
         assert_allclose(bbox._xyxy, bbox2._xyxy)
 
     def test_mul_associative(self) -> None:
-        arr = self._generate_random_array()
+        arr = self._arr
         bbox = BBox(arr)
-        a, b = np.random.rand(2)
+        a, b = self._rng.random(2)
         bbox2 = bbox * a * b
         bbox3 = bbox * (a * b)
         assert_allclose(bbox2._xyxy, bbox3._xyxy)
 
     def test_mul_truediv(self) -> None:
-        arr = self._generate_random_array()
+        arr = self._arr
         bbox = BBox(arr)
-        a = np.random.rand()
+        a = self._rng.random()
         bbox2 = bbox * a / (a, a)
         assert_allclose(bbox._xyxy, bbox2._xyxy)
 
+    def test_scale_per_box(self) -> None:
+        bbox = BBox(self._rng.random((4, 4)))
+        cx, cy = bbox.center
+        bbox2 = bbox.scale(2, bbox.center, inplace=False)
+        cx2, cy2 = bbox2.center
+        assert_allclose(cx2, cx)
+        assert_allclose(cy2, cy)
+        k = self._rng.random(4)
+        bbox3 = bbox * (k, k)
+        for i in range(len(bbox)):
+            assert_allclose(bbox3[i]._xyxy, (bbox[i] * k[i])._xyxy)
+
+    def test_add_sub_mul_out(self) -> None:
+        arr = self._arr
+        bbox = BBox(arr)
+        dx, dy = self._rng.random(2)
+        k = self._rng.random()
+        shift = np.array((dx, dy, dx, dy))
+        scaled = arr * k
+        scaled[..., 2:] = (arr[..., 2:] + 1) * k - 1
+        expected = {"add": arr + shift, "sub": arr - shift, "mul": scaled}
+        for name, value in expected.items():
+            point = k if name == "mul" else (dx, dy)
+            with self.subTest(method=name, out="stale"):
+                out = BBox(self._rng.random(arr.shape))
+                self.assertIs(getattr(bbox, name)(point, out), out)
+                assert_allclose(out._xyxy, value)
+            with self.subTest(method=name, out="self"):
+                bbox2 = BBox(arr, copy=True)
+                self.assertIs(getattr(bbox2, name)(point, bbox2), bbox2)
+                assert_allclose(bbox2._xyxy, value)
+
     def test_is_inside_rectify(self) -> None:
-        arr = self._generate_random_array() + 1
+        arr = self._arr + 1
         size = 1.5
         bbox = BBox(arr).rectify(size)
         print(BBox(arr), bbox)
-        assert_array_equal(bbox.is_inside(size), np.ones(bbox.shape, bool))
+        assert_array_equal(bbox.is_inside(size), np.ones(bbox.shape, bool), strict=True)
+
+    def test_is_inside_per_box(self) -> None:
+        bbox = BBox(self._rng.random((3, 4)) * 4)
+        w, h = self._rng.random((2, 3)) * 4 + 1
+        inside = bbox.is_inside((w, h))
+        for i in range(len(bbox)):
+            self.assertEqual(inside[i], bbox[i].is_inside((w[i], h[i])))
+
+    def test_iou_known(self) -> None:
+        bbox = BBox([[0, 0, 9, 9]] * 3)
+        other = BBox([[5, 5, 14, 14], [20, 20, 29, 29], [9, 9, 0, 0]])
+        expected = np.array([25 / 175, 0.0, 0.0])
+        assert_array_equal(other.area, [100, 100, 0])
+        assert_allclose(bbox.IoU(other), expected)
+        for i in range(len(bbox)):
+            self.assertAlmostEqual(bbox[i].IoU(other[i]), expected[i])
+        assert_allclose(iou_matrix(bbox, other), np.tile(expected, (3, 1)))
+
+    def test_iou_scalar(self) -> None:
+        arr = self._arr.copy()
+        arr[..., 2:] += arr[..., :2]
+        for dtype in (np.float32, np.float64):
+            with self.subTest(dtype=dtype):
+                bbox = BBox(arr, dtype=dtype)
+                iou = bbox[0].IoU(bbox[1])
+                for i in range(len(iou)):
+                    iou_i = bbox[0, i].IoU(bbox[1, i])
+                    assert_array_equal(iou_i, iou[i], strict=True)
+
+    def test_iou_matrix(self) -> None:
+        arr = self._arr.copy()
+        arr[..., 2:] += arr[..., :2]
+        bbox = BBox(arr)
+        iou = iou_matrix(bbox[0], bbox[1])
+        assert_allclose(iou, bbox[0].reshape(3, 1).IoU(bbox[1]))
 
     def test_stack_no_axis(self) -> None:
-        arr = self._generate_random_array()
+        arr = self._arr
         bboxes = [BBox(a) for a in arr]
         bbox = stack(bboxes)
-        assert_array_equal(bbox._xyxy, arr)
+        assert_array_equal(bbox._xyxy, arr, strict=True)
 
     def test_stack_pos_pos_axis(self) -> None:
-        arr = self._generate_random_array()
-        idx: list[Union[slice, int]] = []
+        arr = self._arr
+        arr_bytes = arr.tobytes()
+        shape = arr.shape[:-1]
         for axis in range(arr.ndim - 1):
-            bboxes = [BBox(arr[tuple(idx + [i])]) for i in range(arr.shape[axis])]
+            bboxes = [BBox(a) for a in np.moveaxis(arr, axis, 0)]
             bbox = stack(bboxes, axis)
-            assert_array_equal(bbox._xyxy, arr)
-            idx.append(slice(None))
+            self.assertEqual(bbox.shape, shape)
+            self.assertEqual(bbox._xyxy.tobytes(), arr_bytes)
 
     def test_stack_pos_neg_axis(self) -> None:
-        arr = self._generate_random_array()
-        idx: list[Union[slice, int]] = []
+        arr = self._arr
+        arr_bytes = arr.tobytes()
+        shape = arr.shape[:-1]
         for axis in range(1 - arr.ndim, 0):
-            bboxes = [BBox(arr[tuple(idx + [i])]) for i in range(arr.shape[axis - 1])]
+            bboxes = [BBox(a) for a in np.moveaxis(arr, axis - 1, 0)]
             bbox = stack(bboxes, axis)
-            assert_array_equal(bbox._xyxy, arr)
-            idx.append(slice(None))
+            self.assertEqual(bbox.shape, shape)
+            self.assertEqual(bbox._xyxy.tobytes(), arr_bytes)
 
     def test_stack_neg(self) -> None:
-        arr = self._generate_random_array()
-        bboxes = [BBox(a) for a in arr]
-        axis = arr.ndim - 1
+        arr = self._arr
+        bboxes = unstack(BBox(arr))
         for axis in range(arr.ndim - 1, arr.ndim + 1):
-            with self.assertRaises(AxisError):
+            with self.subTest(axis=axis), self.assertRaises(AxisError):
                 stack(bboxes, axis)
 
+    def test_unstack_stack(self) -> None:
+        arr = self._arr
+        bbox = BBox(arr)
+        for axis in range(-bbox.ndim, bbox.ndim):
+            with self.subTest(axis=axis):
+                bboxes = unstack(bbox, axis)
+                assert_array_equal(stack(bboxes, axis)._xyxy, arr, strict=True)
+
+    def test_unstack_neg(self) -> None:
+        bbox = BBox(self._arr)
+        for axis in (-bbox.ndim - 1, bbox.ndim):
+            with self.subTest(axis=axis), self.assertRaises(AxisError):
+                unstack(bbox, axis)
+
     def test_loadtxt(self) -> None:
         content = b"1,2,3,4"
         with TemporaryFile() as fp:
@@ -164,7 +268,3 @@ class TestBBox(TestCase):
             fp.seek(0)
             bbox = loadtxt(fp)
             self.assertEqual(bbox.shape, (1,))
-
-
-if __name__ == "__main__":
-    main()
@@ -1,43 +1,21 @@
-from unittest import TestCase, main
+from unittest import TestCase
 
 import numpy as np
 from bbox.utils import pair
 
+_ZEROS2 = np.zeros(2, dtype=np.intp)
 
-class TestPair(TestCase):
-    def assertEqualAsPair(self, x, y):
-        self.assertEqual(pair(x), pair(y))
-
-    def test_pair_list(self) -> None:
-        x = 0
-        y = [0, 0]
-        self.assertEqualAsPair(x, y)
 
-    def test_pair_tuple(self) -> None:
-        x = 0
-        y = (0, 0)
-        self.assertEqualAsPair(x, y)
-
-    def test_pair_ndarray(self) -> None:
+class TestPair(TestCase):
+    def test_pair_pos(self) -> None:
         x = 0
-        y = np.array([0, 0])
-        self.assertEqualAsPair(x, y)
-
-    def test_pair_empty_list(self) -> None:
-        y = []
-        with self.assertRaises(ValueError):
-            pair(y)
-
-    def test_pair_singleton_set(self) -> None:
-        y = {0}
-        with self.assertRaises(ValueError):
-            pair(y)
-
-    def test_pair_tripleton_range(self) -> None:
-        y = range(3)
-        with self.assertRaises(ValueError):
-            pair(y)
-
-
-if __name__ == "__main__":
-    main()
+        valid_pairs = [[0, 0], (0, 0), _ZEROS2]
+        for y in valid_pairs:
+            with self.subTest(y=y):
+                self.assertEqual(pair(x), pair(y))
+
+    def test_pair_neg(self) -> None:
+        invalid_pairs = [[], {0}, range(3)]
+        for y in invalid_pairs:
+            with self.subTest(y=y), self.assertRaises(ValueError):
+                pair(y)